@@ -0,0 +1,54 @@
+"""Generate timestamps on the database server
+
+Revision ID: 003
+Revises: 001
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "003"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_COLUMNS = {
+    "users": ["created_at", "updated_at"],
+    "mcp_servers": ["created_at", "updated_at"],
+    "user_credentials": ["created_at", "updated_at"],
+    "user_server_configs": ["created_at", "updated_at"],
+    "conversations": ["created_at", "last_message_at"],
+    "messages": ["created_at"],
+}
+
+
+def upgrade() -> None:
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        for column in columns:
+            # Existing values were written with datetime.utcnow
+            op.alter_column(
+                table,
+                column,
+                type_=sa.DateTime(timezone=True),
+                existing_type=sa.DateTime(),
+                server_default=sa.func.now(),
+                postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+            )
+
+
+def downgrade() -> None:
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.DateTime(),
+                existing_type=sa.DateTime(timezone=True),
+                server_default=None,
+                postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+            )
@@ -0,0 +1,44 @@
+"""Index only active users and servers
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_users_active_slack",
+        "users",
+        ["slack_user_id", "slack_team_id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+    )
+    op.drop_index("idx_user_slack_ids", table_name="users")
+    op.create_index(
+        "idx_mcp_servers_active_name",
+        "mcp_servers",
+        ["name"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_mcp_servers_active_name", table_name="mcp_servers")
+    op.create_index(
+        "idx_user_slack_ids", "users", ["slack_user_id", "slack_team_id"], unique=False
+    )
+    op.drop_index("idx_users_active_slack", table_name="users")
@@ -0,0 +1,27 @@
+"""Drop the standalone users.slack_team_id index
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index(op.f("ix_users_slack_team_id"), table_name="users")
+
+
+def downgrade() -> None:
+    op.create_index(
+        op.f("ix_users_slack_team_id"), "users", ["slack_team_id"], unique=False
+    )
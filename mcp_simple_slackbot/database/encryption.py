@@ -1,51 +1,76 @@
 import base64
+import functools
 import os
 from typing import Optional
 
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from .settings import get_settings
+
+try:
+    # fastpbkdf2 reuses the HMAC pad midstates across iterations
+    from fastpbkdf2 import pbkdf2_hmac
+except ImportError:
+    from hashlib import pbkdf2_hmac  # type: ignore[assignment]
+
+_AESGCM_VERSION = b"\x02"
+_AESGCM_KEY_INFO = b"mcp-slackbot credential aes-256-gcm"
+_NONCE_SIZE = 12
+
+
+@functools.lru_cache(maxsize=4)
+def _derive_key(master_password: bytes, salt: bytes) -> bytes:
+    key = pbkdf2_hmac("sha256", master_password, salt, 100_000, dklen=32)
+    return base64.urlsafe_b64encode(key)
+
+
+def _derive_aead_key(key: bytes) -> bytes:
+    # Fernet already splits this key into HMAC and AES halves, so AES-GCM gets
+    # its own subkey instead of reusing the same bytes in a second construction
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=_AESGCM_KEY_INFO)
+    return hkdf.derive(base64.urlsafe_b64decode(key))
 
 
 class EncryptionService:
     def __init__(self, master_key: Optional[str] = None):
-        if master_key:
-            self.fernet = Fernet(master_key.encode())
-        else:
-            self.fernet = self._create_fernet_from_env()
-
-    def _create_fernet_from_env(self) -> Fernet:
-        encryption_key = os.getenv("ENCRYPTION_KEY")
-        if encryption_key:
-            return Fernet(encryption_key.encode())
-
-        master_password = os.getenv("MASTER_PASSWORD")
-        if not master_password:
+        key = master_key.encode() if master_key else self._load_key_from_env()
+        # Fernet is kept only to read tokens written before the AES-GCM switch
+        self.fernet = Fernet(key)
+        self.aead = AESGCM(_derive_aead_key(key))
+
+    def _load_key_from_env(self) -> bytes:
+        settings = get_settings()
+        if settings.encryption_key:
+            return settings.encryption_key.encode()
+
+        if not settings.master_password:
             raise ValueError(
                 "Either ENCRYPTION_KEY or MASTER_PASSWORD must be set in "
                 "environment variables"
             )
 
-        salt = os.getenv("ENCRYPTION_SALT", "mcp-slackbot-default-salt").encode()
-
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
+        return _derive_key(
+            settings.master_password.encode(), settings.encryption_salt.encode()
         )
-        key = base64.urlsafe_b64encode(kdf.derive(master_password.encode()))
-        return Fernet(key)
 
     def encrypt(self, plaintext: str) -> str:
         if not plaintext:
             return ""
-        return self.fernet.encrypt(plaintext.encode()).decode()
+        nonce = os.urandom(_NONCE_SIZE)
+        ciphertext = self.aead.encrypt(nonce, plaintext.encode(), None)
+        return base64.urlsafe_b64encode(_AESGCM_VERSION + nonce + ciphertext).decode()
 
     def decrypt(self, ciphertext: str) -> str:
         if not ciphertext:
             return ""
-        return self.fernet.decrypt(ciphertext.encode()).decode()
+        token = base64.urlsafe_b64decode(ciphertext)
+        if token[:1] != _AESGCM_VERSION:
+            return self.fernet.decrypt(ciphertext.encode()).decode()
+        nonce = token[1 : 1 + _NONCE_SIZE]
+        return self.aead.decrypt(nonce, token[1 + _NONCE_SIZE :], None).decode()
 
     @staticmethod
     def generate_key() -> str:
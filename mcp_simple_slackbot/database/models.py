@@ -1,5 +1,3 @@
-from datetime import datetime
-
 from sqlalchemy import (
     JSON,
     Boolean,
@@ -11,6 +9,7 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
+    func,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -23,13 +22,15 @@ class User(Base):
 
     id = Column(Integer, primary_key=True)
     slack_user_id = Column(String(50), unique=True, nullable=False, index=True)
-    slack_team_id = Column(String(50), nullable=False, index=True)
+    slack_team_id = Column(String(50), nullable=False)
     email = Column(String(255))
     display_name = Column(String(255))
     real_name = Column(String(255))
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
 
     credentials = relationship(
         "UserCredential", back_populates="user", cascade="all, delete-orphan"
@@ -41,7 +42,14 @@ class User(Base):
         "Conversation", back_populates="user", cascade="all, delete-orphan"
     )
 
-    __table_args__ = (Index("idx_user_slack_ids", "slack_user_id", "slack_team_id"),)
+    __table_args__ = (
+        Index(
+            "idx_users_active_slack",
+            "slack_user_id",
+            "slack_team_id",
+            postgresql_where=is_active,
+        ),
+    )
 
 
 class MCPServer(Base):
@@ -55,13 +63,19 @@ class MCPServer(Base):
     required_credentials = Column(JSON, default=list)
     description = Column(Text)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
 
     user_configs = relationship(
         "UserServerConfig", back_populates="server", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        Index("idx_mcp_servers_active_name", "name", postgresql_where=is_active),
+    )
+
 
 class UserCredential(Base):
     __tablename__ = "user_credentials"
@@ -73,8 +87,10 @@ class UserCredential(Base):
     credential_type = Column(String(50), nullable=False)
     credential_name = Column(String(100), nullable=False)
     encrypted_value = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
 
     user = relationship("User", back_populates="credentials")
 
@@ -98,8 +114,10 @@ class UserServerConfig(Base):
     )
     is_enabled = Column(Boolean, default=True)
     custom_env = Column(JSON, default=dict)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
 
     user = relationship("User", back_populates="server_configs")
     server = relationship("MCPServer", back_populates="user_configs")
@@ -119,8 +137,8 @@ class Conversation(Base):
     )
     slack_channel_id = Column(String(50), nullable=False, index=True)
     slack_thread_ts = Column(String(50))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    last_message_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_message_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="conversations")
     messages = relationship(
@@ -147,7 +165,7 @@ class Message(Base):
     role = Column(String(20), nullable=False)
     content = Column(Text, nullable=False)
     slack_ts = Column(String(50))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     conversation = relationship("Conversation", back_populates="messages")
 
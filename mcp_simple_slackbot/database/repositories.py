@@ -1,10 +1,21 @@
-from typing import Any, Dict, List, Optional
-
-from sqlalchemy import and_, select
+import asyncio
+import copy
+import time
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, bindparam, event, func, insert, lambda_stmt, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import (
+    ORMExecuteState,
+    Session,
+    aliased,
+    make_transient_to_detached,
+    selectinload,
+)
 
-from .encryption import get_encryption_service
+from .encryption import EncryptionService, get_encryption_service
 from .models import (
     Conversation,
     MCPServer,
@@ -14,6 +25,142 @@ from .models import (
     UserServerConfig,
 )
 
+# Hot lookups are built once; parameters are bound at execution time
+_USER_BY_SLACK_ID = lambda_stmt(
+    lambda: select(User).where(
+        User.slack_user_id == bindparam("slack_user_id"),
+        User.slack_team_id == bindparam("slack_team_id"),
+        User.is_active,
+    )
+)
+_USER_WITH_CHILDREN_BY_SLACK_ID = lambda_stmt(
+    lambda: (
+        select(User)
+        .where(
+            User.slack_user_id == bindparam("slack_user_id"),
+            User.slack_team_id == bindparam("slack_team_id"),
+            User.is_active,
+        )
+        .options(selectinload(User.credentials), selectinload(User.server_configs))
+    )
+)
+_CREDENTIAL_VALUE_BY_KEY = lambda_stmt(
+    lambda: select(UserCredential.encrypted_value).where(
+        UserCredential.user_id == bindparam("user_id"),
+        UserCredential.credential_type == bindparam("credential_type"),
+        UserCredential.credential_name == bindparam("credential_name"),
+    )
+)
+_CREDENTIALS_BY_USER = lambda_stmt(
+    lambda: select(
+        UserCredential.credential_type,
+        UserCredential.credential_name,
+        UserCredential.encrypted_value,
+    ).where(UserCredential.user_id == bindparam("user_id"))
+)
+_PRESENT_CREDENTIAL_NAMES = lambda_stmt(
+    lambda: select(UserCredential.credential_name).where(
+        UserCredential.user_id == bindparam("user_id"),
+        UserCredential.credential_type == bindparam("credential_type"),
+        UserCredential.credential_name.in_(bindparam("names", expanding=True)),
+    )
+)
+_SERVER_BY_NAME = lambda_stmt(
+    lambda: select(MCPServer).where(
+        MCPServer.name == bindparam("name"), MCPServer.is_active
+    )
+)
+_ACTIVE_SERVERS = lambda_stmt(lambda: select(MCPServer).where(MCPServer.is_active))
+
+
+def _recent_messages() -> Any:
+    # The newest `limit` messages, returned oldest first
+    latest = (
+        select(Message)
+        .where(Message.conversation_id == bindparam("conversation_id"))
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(bindparam("limit"))
+        .subquery()
+    )
+    recent_message = aliased(Message, latest)
+    return select(recent_message).order_by(latest.c.created_at.asc(), latest.c.id.asc())
+
+
+_RECENT_MESSAGES = lambda_stmt(lambda: _recent_messages())
+
+# Server definitions are read-mostly; cache them per process for a short TTL.
+# Keyed by server name, with None holding the full active server list. Entries
+# hold column snapshots rather than ORM instances, which a rollback or closed
+# session elsewhere would expire. Reads are only stored once their session
+# commits, and any committed write to mcp_servers clears the cache.
+_SERVER_CACHE_TTL = 30.0
+_SERVER_COLUMNS = tuple(attr.key for attr in sa_inspect(MCPServer).column_attrs)
+_server_cache: Dict[Optional[str], Tuple[float, List[Tuple[Any, ...]]]] = {}
+# Bumped on every invalidation so a read that raced a write is not stored
+_server_cache_generation = 0
+
+
+def clear_server_cache() -> None:
+    global _server_cache_generation
+    _server_cache_generation += 1
+    _server_cache.clear()
+
+
+def _writes_servers(session: Session) -> bool:
+    if session.info.get("servers_changed"):
+        return True
+    pending = (*session.new, *session.dirty, *session.deleted)
+    return any(isinstance(obj, MCPServer) for obj in pending)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_server_flush(session: Session, flush_context: Any) -> None:
+    if _writes_servers(session):
+        session.info["servers_changed"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_server_statements(orm_execute_state: ORMExecuteState) -> None:
+    mapper = orm_execute_state.bind_mapper
+    if (
+        mapper is not None
+        and mapper.class_ is MCPServer
+        and not orm_execute_state.is_select
+    ):
+        orm_execute_state.session.info["servers_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_servers(session: Session) -> None:
+    if session.info.pop("servers_changed", False):
+        clear_server_cache()
+
+
+def _snapshot_server(server: MCPServer) -> Tuple[Any, ...]:
+    return copy.deepcopy(tuple(getattr(server, key) for key in _SERVER_COLUMNS))
+
+
+def _server_from_snapshot(snapshot: Tuple[Any, ...]) -> MCPServer:
+    # JSON columns are copied so callers cannot mutate the cached values
+    server = MCPServer(**dict(zip(_SERVER_COLUMNS, copy.deepcopy(snapshot))))
+    make_transient_to_detached(server)
+    return server
+
+
+# Smaller batches decrypt faster than a hop to the worker thread costs
+_INLINE_DECRYPT_LIMIT = 16
+
+
+def _bulk_decrypt(encryption: EncryptionService, ciphertexts: List[str]) -> List[str]:
+    return [encryption.decrypt(ciphertext) for ciphertext in ciphertexts]
+
+
+def _upsert(session: AsyncSession, model: Any) -> Any:
+    # Both dialects expose INSERT ... ON CONFLICT DO UPDATE with the same API
+    if session.bind is not None and session.bind.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
@@ -40,28 +187,39 @@ class UserRepository:
         return user
 
     async def get_user_by_slack_id(
-        self, slack_user_id: str, slack_team_id: str
+        self, slack_user_id: str, slack_team_id: str, load_children: bool = False
     ) -> Optional[User]:
+        stmt = _USER_WITH_CHILDREN_BY_SLACK_ID if load_children else _USER_BY_SLACK_ID
         result = await self.session.execute(
-            select(User)
-            .where(
-                and_(
-                    User.slack_user_id == slack_user_id,
-                    User.slack_team_id == slack_team_id,
-                    User.is_active,
-                )
-            )
-            .options(selectinload(User.credentials), selectinload(User.server_configs))
+            stmt, {"slack_user_id": slack_user_id, "slack_team_id": slack_team_id}
         )
         return result.scalar_one_or_none()
 
     async def get_or_create_user(
         self, slack_user_id: str, slack_team_id: str, **kwargs
     ) -> User:
+        # Relationships are not loaded; use get_user_by_slack_id when needed
         user = await self.get_user_by_slack_id(slack_user_id, slack_team_id)
-        if not user:
-            user = await self.create_user(slack_user_id, slack_team_id, **kwargs)
-        return user
+        if user is not None:
+            return user
+
+        result = await self.session.execute(
+            _upsert(self.session, User)
+            .values(slack_user_id=slack_user_id, slack_team_id=slack_team_id, **kwargs)
+            .on_conflict_do_nothing()
+            .returning(User)
+        )
+        user = result.scalar_one_or_none()
+        if user is not None:
+            return user
+
+        # Lost a race with another insert, or the Slack ID belongs to a
+        # deactivated user or another team, which this lookup must not return
+        result = await self.session.execute(
+            _USER_BY_SLACK_ID,
+            {"slack_user_id": slack_user_id, "slack_team_id": slack_team_id},
+        )
+        return result.scalar_one()
 
 
 class CredentialRepository:
@@ -74,63 +232,103 @@ class CredentialRepository:
     ) -> UserCredential:
         encrypted_value = self.encryption.encrypt(value)
 
-        existing = await self.session.execute(
-            select(UserCredential).where(
-                and_(
-                    UserCredential.user_id == user_id,
-                    UserCredential.credential_type == credential_type,
-                    UserCredential.credential_name == credential_name,
-                )
-            )
-        )
-        credential = existing.scalar_one_or_none()
-
-        if credential:
-            credential.encrypted_value = encrypted_value  # type: ignore[assignment]
-        else:
-            credential = UserCredential(
+        stmt = (
+            _upsert(self.session, UserCredential)
+            .values(
                 user_id=user_id,
                 credential_type=credential_type,
                 credential_name=credential_name,
                 encrypted_value=encrypted_value,
             )
-            self.session.add(credential)
-
-        await self.session.flush()
-        return credential
+            .on_conflict_do_update(
+                index_elements=["user_id", "credential_type", "credential_name"],
+                set_={"encrypted_value": encrypted_value, "updated_at": func.now()},
+            )
+            .returning(UserCredential)
+        )
+        result = await self.session.execute(
+            stmt, execution_options={"populate_existing": True}
+        )
+        return result.scalar_one()
+
+    async def store_credentials(
+        self, user_id: int, credential_type: str, credentials: Dict[str, str]
+    ) -> List[UserCredential]:
+        if not credentials:
+            return []
+
+        stmt = _upsert(self.session, UserCredential).values(
+            [
+                {
+                    "user_id": user_id,
+                    "credential_type": credential_type,
+                    "credential_name": credential_name,
+                    "encrypted_value": self.encryption.encrypt(value),
+                }
+                for credential_name, value in credentials.items()
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "credential_type", "credential_name"],
+            set_={
+                "encrypted_value": stmt.excluded.encrypted_value,
+                "updated_at": func.now(),
+            },
+        ).returning(UserCredential)
+        result = await self.session.execute(
+            stmt, execution_options={"populate_existing": True}
+        )
+        return list(result.scalars().all())
 
     async def get_credential(
         self, user_id: int, credential_type: str, credential_name: str
     ) -> Optional[str]:
         result = await self.session.execute(
-            select(UserCredential).where(
-                and_(
-                    UserCredential.user_id == user_id,
-                    UserCredential.credential_type == credential_type,
-                    UserCredential.credential_name == credential_name,
-                )
-            )
+            _CREDENTIAL_VALUE_BY_KEY,
+            {
+                "user_id": user_id,
+                "credential_type": credential_type,
+                "credential_name": credential_name,
+            },
         )
-        credential = result.scalar_one_or_none()
+        encrypted_value = result.scalar_one_or_none()
 
-        if credential:
-            return self.encryption.decrypt(credential.encrypted_value)  # type: ignore[arg-type]
+        if encrypted_value is not None:
+            return self.encryption.decrypt(encrypted_value)
         return None
 
-    async def get_user_credentials(self, user_id: int) -> Dict[str, Dict[str, str]]:
+    async def get_present_credential_names(
+        self, user_id: int, credential_type: str, names: Collection[str]
+    ) -> Set[str]:
+        if not names:
+            return set()
+
         result = await self.session.execute(
-            select(UserCredential).where(UserCredential.user_id == user_id)
+            _PRESENT_CREDENTIAL_NAMES,
+            {
+                "user_id": user_id,
+                "credential_type": credential_type,
+                "names": list(names),
+            },
         )
-        credentials = result.scalars().all()
-
-        decrypted = {}
-        for cred in credentials:
-            if cred.credential_type not in decrypted:
-                decrypted[cred.credential_type] = {}
-            decrypted[cred.credential_type][cred.credential_name] = (
-                self.encryption.decrypt(cred.encrypted_value)  # type: ignore[arg-type]
+        return set(result.scalars().all())
+
+    async def get_user_credentials(self, user_id: int) -> Dict[str, Dict[str, str]]:
+        result = await self.session.execute(_CREDENTIALS_BY_USER, {"user_id": user_id})
+        rows = result.all()
+
+        ciphertexts = [encrypted_value for _, _, encrypted_value in rows]
+        if len(ciphertexts) <= _INLINE_DECRYPT_LIMIT:
+            values = _bulk_decrypt(self.encryption, ciphertexts)
+        else:
+            values = await asyncio.to_thread(
+                _bulk_decrypt, self.encryption, ciphertexts
             )
 
+        decrypted: Dict[str, Dict[str, str]] = {}
+        for (credential_type, credential_name, _), value in zip(rows, values):
+            decrypted.setdefault(credential_type, {})[credential_name] = value
+
         return decrypted
 
 
@@ -160,30 +358,59 @@ class ServerRepository:
         return server
 
     async def get_server_by_name(self, name: str) -> Optional[MCPServer]:
-        result = await self.session.execute(
-            select(MCPServer).where(and_(MCPServer.name == name, MCPServer.is_active))
-        )
-        return result.scalar_one_or_none()
+        servers = await self._get_cached_servers(name, _SERVER_BY_NAME, {"name": name})
+        return servers[0] if servers else None
 
     async def get_all_servers(self) -> List[MCPServer]:
+        return await self._get_cached_servers(None, _ACTIVE_SERVERS, {})
+
+    async def _get_cached_servers(
+        self, key: Optional[str], stmt: Any, params: Dict[str, Any]
+    ) -> List[MCPServer]:
+        sync_session = self.session.sync_session
+        # A session with its own uncommitted server writes must see them
+        if _writes_servers(sync_session):
+            result = await self.session.execute(stmt, params)
+            return list(result.scalars().all())
+
+        entry = _server_cache.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            generation = _server_cache_generation
+            result = await self.session.execute(stmt, params)
+            servers = list(result.scalars().all())
+            snapshots = [_snapshot_server(server) for server in servers]
+
+            def _store(session: Session) -> None:
+                if generation == _server_cache_generation:
+                    expires = time.monotonic() + _SERVER_CACHE_TTL
+                    _server_cache[key] = (expires, snapshots)
+
+            # Rolled-back reads may have seen rows that never existed
+            event.listen(sync_session, "after_commit", _store, once=True)
+            return servers
+
+        # Attach fresh copies of the cached rows without touching the database
+        return [
+            await self.session.merge(_server_from_snapshot(snapshot), load=False)
+            for snapshot in entry[1]
+        ]
+
+    async def get_user_enabled_servers(
+        self, user_id: int
+    ) -> List[Tuple[MCPServer, UserServerConfig]]:
         result = await self.session.execute(
-            select(MCPServer).where(MCPServer.is_active)
-        )
-        return list(result.scalars().all())
-
-    async def get_user_enabled_servers(self, user_id: int) -> List[MCPServer]:
-        result = await self.session.execute(
-            select(MCPServer)
-            .join(UserServerConfig)
-            .where(
+            select(MCPServer, UserServerConfig)
+            .join(
+                UserServerConfig,
                 and_(
+                    UserServerConfig.server_id == MCPServer.id,
                     UserServerConfig.user_id == user_id,
                     UserServerConfig.is_enabled,
-                    MCPServer.is_active,
-                )
+                ),
             )
+            .where(MCPServer.is_active)
         )
-        return list(result.scalars().all())
+        return [(server, config) for server, config in result.all()]
 
 
 class UserServerConfigRepository:
@@ -193,47 +420,40 @@ class UserServerConfigRepository:
     async def enable_server_for_user(
         self, user_id: int, server_id: int, custom_env: Optional[Dict[str, str]] = None
     ) -> UserServerConfig:
-        existing = await self.session.execute(
-            select(UserServerConfig).where(
-                and_(
-                    UserServerConfig.user_id == user_id,
-                    UserServerConfig.server_id == server_id,
-                )
-            )
-        )
-        config = existing.scalar_one_or_none()
-
-        if config:
-            config.is_enabled = True  # type: ignore[assignment]
-            config.custom_env = custom_env or {}  # type: ignore[assignment]
-        else:
-            config = UserServerConfig(
+        stmt = (
+            _upsert(self.session, UserServerConfig)
+            .values(
                 user_id=user_id,
                 server_id=server_id,
                 is_enabled=True,
                 custom_env=custom_env or {},
             )
-            self.session.add(config)
-
-        await self.session.flush()
-        return config
+            .on_conflict_do_update(
+                index_elements=["user_id", "server_id"],
+                set_={
+                    "is_enabled": True,
+                    "custom_env": custom_env or {},
+                    "updated_at": func.now(),
+                },
+            )
+            .returning(UserServerConfig)
+        )
+        result = await self.session.execute(
+            stmt, execution_options={"populate_existing": True}
+        )
+        return result.scalar_one()
 
     async def disable_server_for_user(self, user_id: int, server_id: int) -> bool:
         result = await self.session.execute(
-            select(UserServerConfig).where(
-                and_(
-                    UserServerConfig.user_id == user_id,
-                    UserServerConfig.server_id == server_id,
-                )
+            update(UserServerConfig)
+            .where(
+                UserServerConfig.user_id == user_id,
+                UserServerConfig.server_id == server_id,
             )
+            .values(is_enabled=False)
+            .returning(UserServerConfig.id)
         )
-        config = result.scalar_one_or_none()
-
-        if config:
-            config.is_enabled = False  # type: ignore[assignment]
-            await self.session.flush()
-            return True
-        return False
+        return result.first() is not None
 
 
 class ConversationRepository:
@@ -244,15 +464,13 @@ class ConversationRepository:
         self, user_id: int, slack_channel_id: str, slack_thread_ts: Optional[str] = None
     ) -> Conversation:
         result = await self.session.execute(
-            select(Conversation)
-            .where(
+            select(Conversation).where(
                 and_(
                     Conversation.user_id == user_id,
                     Conversation.slack_channel_id == slack_channel_id,
                     Conversation.slack_thread_ts == slack_thread_ts,
                 )
             )
-            .options(selectinload(Conversation.messages))
         )
         conversation = result.scalar_one_or_none()
 
@@ -274,29 +492,44 @@ class ConversationRepository:
         content: str,
         slack_ts: Optional[str] = None,
     ) -> Message:
-        message = Message(
-            conversation_id=conversation_id,
-            role=role,
-            content=content,
-            slack_ts=slack_ts,
+        messages = await self.add_messages(
+            conversation_id, [{"role": role, "content": content, "slack_ts": slack_ts}]
         )
-        self.session.add(message)
+        return messages[0]
 
-        conversation = await self.session.get(Conversation, conversation_id)
-        if conversation:
-            conversation.last_message_at = message.created_at
+    async def add_messages(
+        self, conversation_id: int, messages: List[Dict[str, Any]]
+    ) -> List[Message]:
+        if not messages:
+            return []
 
-        await self.session.flush()
-        return message
+        # One INSERT ... RETURNING hands back ids and created_at in input order
+        result = await self.session.execute(
+            insert(Message).returning(Message, sort_by_parameter_order=True),
+            [
+                {
+                    "conversation_id": conversation_id,
+                    "role": message["role"],
+                    "content": message["content"],
+                    "slack_ts": message.get("slack_ts"),
+                }
+                for message in messages
+            ],
+        )
+        inserted = list(result.scalars().all())
+
+        await self.session.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(last_message_at=inserted[-1].created_at)
+            .execution_options(synchronize_session=False)
+        )
+        return inserted
 
     async def get_conversation_messages(
         self, conversation_id: int, limit: int = 10
     ) -> List[Message]:
         result = await self.session.execute(
-            select(Message)
-            .where(Message.conversation_id == conversation_id)
-            .order_by(Message.created_at.desc())
-            .limit(limit)
+            _RECENT_MESSAGES, {"conversation_id": conversation_id, "limit": limit}
         )
-        messages = list(result.scalars().all())
-        return messages[::-1]
+        return list(result.scalars().all())
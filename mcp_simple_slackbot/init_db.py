@@ -9,7 +9,10 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from mcp_simple_slackbot.database.encryption import EncryptionService
+from mcp_simple_slackbot.database.encryption import (
+    EncryptionService,
+    get_encryption_service,
+)
 from mcp_simple_slackbot.database.session import get_db_manager
 
 
@@ -38,7 +41,7 @@ async def init_database():
         print("Database tables created successfully!")
 
         # Test encryption
-        encryption = EncryptionService()
+        encryption = get_encryption_service()
         test_string = "test_encryption"
         encrypted = encryption.encrypt(test_string)
         decrypted = encryption.decrypt(encrypted)
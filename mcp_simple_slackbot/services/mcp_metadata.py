@@ -1,9 +1,12 @@
+import hashlib
+import json
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CredentialRequirement:
     type: str
     name: str
@@ -14,18 +17,67 @@ class CredentialRequirement:
 
 
 class MCPMetadataParser:
-    KNOWN_CREDENTIAL_PATTERNS = {
-        "oauth_token": r".*(OAUTH|ACCESS)_TOKEN$",  # More specific, check first
-        "api_key": r".*(_API_KEY|_KEY|_TOKEN)$",
-        "username": r".*(USERNAME|USER|LOGIN)$",
-        "password": r".*(PASSWORD|PASS|SECRET)$",
-        "url": r".*(URL|ENDPOINT|HOST)$",
-        "database": r".*(DATABASE|DB)_(NAME|URL|CONNECTION)$",
+    # Checked in order against the upper-cased env var name
+    KNOWN_CREDENTIAL_SUFFIXES = {
+        "oauth_token": ("OAUTH_TOKEN", "ACCESS_TOKEN"),  # More specific, check first
+        "api_key": ("_API_KEY", "_KEY", "_TOKEN"),
+        "username": ("USERNAME", "USER", "LOGIN"),
+        "password": ("PASSWORD", "PASS", "SECRET"),
+        "url": ("URL", "ENDPOINT", "HOST"),
+        "database": (
+            "DATABASE_NAME",
+            "DATABASE_URL",
+            "DATABASE_CONNECTION",
+            "DB_NAME",
+            "DB_URL",
+            "DB_CONNECTION",
+        ),
     }
+    # Wrapped forms like ${VAR} and <VAR> anywhere in the value
+    _PLACEHOLDER_MARKER_RE = re.compile(r"\$\{|\{\{|[<\[]")
+    _PLACEHOLDER_WORD_RE = re.compile(
+        r"PLACEHOLDER|YOUR_|INSERT_|CHANGE_ME|REQUIRED|NEEDED", re.IGNORECASE
+    )
+    _PLACEHOLDER_SCAN_LENGTH = 128
+    # Prefixes and suffixes dropped when deriving a display name from an env var
+    _DROP_WORDS = frozenset(
+        {
+            "MCP",
+            "SERVER",
+            "CLIENT",
+            "API",
+            "KEY",
+            "TOKEN",
+            "SECRET",
+            "PASS",
+            "PASSWORD",
+        }
+    )
+    _METADATA_CACHE_SIZE = 256
+    _metadata_cache: Dict[bytes, Tuple[CredentialRequirement, ...]] = {}
 
     @classmethod
     def parse_server_metadata(
         cls, server_config: Dict[str, Any]
+    ) -> List[CredentialRequirement]:
+        try:
+            serialized = json.dumps(server_config, sort_keys=True).encode()
+        except TypeError:
+            return cls._parse_server_metadata(server_config)
+
+        # Key on a digest of the canonical JSON rather than the JSON itself
+        key = hashlib.blake2b(serialized, digest_size=16).digest()
+        cached = cls._metadata_cache.get(key)
+        if cached is None:
+            if len(cls._metadata_cache) >= cls._METADATA_CACHE_SIZE:
+                cls._metadata_cache.clear()
+            cached = tuple(cls._parse_server_metadata(server_config))
+            cls._metadata_cache[key] = cached
+        return list(cached)
+
+    @classmethod
+    def _parse_server_metadata(
+        cls, server_config: Dict[str, Any]
     ) -> List[CredentialRequirement]:
         required_credentials = []
 
@@ -44,72 +96,60 @@ class MCPMetadataParser:
                     )
                 )
 
+        declared_env_vars = {c.env_var for c in required_credentials if c.env_var}
+
         env_vars = server_config.get("env", {})
         for env_var, value in env_vars.items():
+            if env_var in declared_env_vars:
+                continue
+
             if cls._is_credential_placeholder(value):
-                cred_type = cls._detect_credential_type(env_var)
-                cred_name = cls._extract_credential_name(env_var)
-
-                if not any(c.env_var == env_var for c in required_credentials):
-                    required_credentials.append(
-                        CredentialRequirement(
-                            type=cred_type,
-                            name=cred_name,
-                            description=f"Environment variable: {env_var}",
-                            env_var=env_var,
-                        )
+                env_var_upper = env_var.upper()
+                required_credentials.append(
+                    CredentialRequirement(
+                        type=cls._detect_credential_type(env_var_upper),
+                        name=cls._extract_credential_name(env_var_upper),
+                        description=f"Environment variable: {env_var}",
+                        env_var=env_var,
                     )
+                )
 
         return required_credentials
 
-    @staticmethod
-    def _is_credential_placeholder(value: str) -> bool:
+    @classmethod
+    def _is_credential_placeholder(cls, value: str) -> bool:
         if not isinstance(value, str):
             return False
+        if not value:
+            return True
+        if cls._PLACEHOLDER_MARKER_RE.search(value):
+            return True
 
-        placeholders = [
-            "${",
-            "{{",
-            "<",
-            "[",
-            "PLACEHOLDER",
-            "YOUR_",
-            "INSERT_",
-            "CHANGE_ME",
-            "REQUIRED",
-            "NEEDED",
-        ]
-
-        return any(marker in value.upper() for marker in placeholders) or value == ""
+        # Word markers show up near the start of a placeholder
+        return bool(
+            cls._PLACEHOLDER_WORD_RE.search(value, 0, cls._PLACEHOLDER_SCAN_LENGTH)
+        )
 
+    # Env var names repeat across server configs (API_KEY, GITHUB_TOKEN, ...)
     @classmethod
-    def _detect_credential_type(cls, env_var: str) -> str:
-        env_var_upper = env_var.upper()
-
-        for cred_type, pattern in cls.KNOWN_CREDENTIAL_PATTERNS.items():
-            if re.match(pattern, env_var_upper):
+    @lru_cache(maxsize=512)
+    def _detect_credential_type(cls, env_var_upper: str) -> str:
+        for cred_type, suffixes in cls.KNOWN_CREDENTIAL_SUFFIXES.items():
+            if env_var_upper.endswith(suffixes):
                 return cred_type
 
         return "generic"
 
-    @staticmethod
-    def _extract_credential_name(env_var: str) -> str:
-        words = env_var.split("_")
-
-        prefixes_to_remove = ["MCP", "SERVER", "CLIENT", "API"]
-        suffixes_to_remove = ["KEY", "TOKEN", "SECRET", "PASS", "PASSWORD"]
-
-        filtered_words = []
-        for word in words:
-            if (
-                word.upper() not in prefixes_to_remove
-                and word.upper() not in suffixes_to_remove
-            ):
-                filtered_words.append(word)
+    @classmethod
+    @lru_cache(maxsize=512)
+    def _extract_credential_name(cls, env_var_upper: str) -> str:
+        # Case doesn't matter: the result is title-cased either way
+        words = env_var_upper.split("_")
+        filtered_words = [word for word in words if word not in cls._DROP_WORDS]
 
         if filtered_words:
             return " ".join(filtered_words).title()
-        return env_var.replace("_", " ").title()
+        return env_var_upper.replace("_", " ").title()
 
     @staticmethod
     def build_env_with_credentials(
@@ -117,10 +157,9 @@ class MCPMetadataParser:
         credentials: Dict[str, str],
         credential_requirements: List[CredentialRequirement],
     ) -> Dict[str, str]:
-        env = server_env.copy()
-
-        for req in credential_requirements:
-            if req.env_var and req.name in credentials:
-                env[req.env_var] = credentials[req.name]
-
-        return env
+        overrides = {
+            req.env_var: credentials[req.name]
+            for req in credential_requirements
+            if req.env_var and req.name in credentials
+        }
+        return {**server_env, **overrides}
@@ -1,6 +1,11 @@
-import json
+import asyncio
+import copy
+import heapq
+import logging
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 from slack_sdk.errors import SlackApiError
 from slack_sdk.web.async_client import AsyncWebClient
@@ -13,22 +18,36 @@ from ..database.repositories import (
 from ..database.session import get_db_manager
 from .mcp_metadata import CredentialRequirement, MCPMetadataParser
 
+logger = logging.getLogger(__name__)
+
 
 class SlackAuthService:
     def __init__(self, slack_client: AsyncWebClient):
         self.slack_client = slack_client
         self.pending_auth_flows: Dict[str, Dict[str, Any]] = {}
         self.auth_flow_timeout = timedelta(minutes=10)
+        # (monotonic expiry, flow_id), soonest first; finished flows are skipped lazily
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._team_id: Optional[str] = None
+        self._team_id_lock = asyncio.Lock()
+
+    async def _get_team_id(self) -> str:
+        # The team is fixed for a bot token, so ask Slack once
+        if self._team_id is None:
+            async with self._team_id_lock:
+                if self._team_id is None:
+                    auth_response = await self.slack_client.auth_test()
+                    self._team_id = auth_response["team_id"] or ""
+        return self._team_id
 
     def _cleanup_expired_flows(self):
-        current_time = datetime.utcnow()
-        expired_flows = [
-            flow_id
-            for flow_id, flow_data in self.pending_auth_flows.items()
-            if current_time - flow_data["created_at"] > self.auth_flow_timeout
-        ]
-        for flow_id in expired_flows:
-            del self.pending_auth_flows[flow_id]
+        now = time.monotonic()
+        while self._expiry_heap and self._expiry_heap[0][0] < now:
+            _, flow_id = heapq.heappop(self._expiry_heap)
+            flow_data = self.pending_auth_flows.get(flow_id)
+            # The ID may have been reused by a newer flow that hasn't expired
+            if flow_data and flow_data["expires_at"] < now:
+                del self.pending_auth_flows[flow_id]
 
     async def request_credentials(
         self,
@@ -39,16 +58,21 @@ class SlackAuthService:
     ) -> str:
         self._cleanup_expired_flows()
 
-        flow_id = f"{user_slack_id}_{server_name}_{int(datetime.utcnow().timestamp())}"
+        created_at = datetime.utcnow()
+        expires_at = time.monotonic() + self.auth_flow_timeout.total_seconds()
+        flow_id = f"{user_slack_id}_{server_name}_{int(created_at.timestamp())}"
 
-        self.pending_auth_flows[flow_id] = {
+        flow_data: Dict[str, Any] = {
             "user_slack_id": user_slack_id,
             "server_name": server_name,
             "credentials": missing_credentials,
             "collected": {},
-            "created_at": datetime.utcnow(),
+            "created_at": created_at,
+            "expires_at": expires_at,
             "current_index": 0,
         }
+        self.pending_auth_flows[flow_id] = flow_data
+        heapq.heappush(self._expiry_heap, (expires_at, flow_id))
 
         blocks = self._build_credential_request_blocks(
             server_name, missing_credentials[0], 0, len(missing_credentials)
@@ -63,17 +87,35 @@ class SlackAuthService:
             )
             return flow_id
         except SlackApiError as e:
-            print(f"Error sending credential request: {e}")
+            logger.error("Error sending credential request: %s", e)
             del self.pending_auth_flows[flow_id]
             raise
 
+    @staticmethod
     def _build_credential_request_blocks(
-        self,
         server_name: str,
         credential: CredentialRequirement,
         current_index: int,
         total_count: int,
     ) -> List[Dict[str, Any]]:
+        # Each caller gets its own copy, since Slack helpers may edit blocks
+        return copy.deepcopy(
+            list(
+                SlackAuthService._render_credential_request_blocks(
+                    server_name, credential, current_index, total_count
+                )
+            )
+        )
+
+    # Blocks depend only on the arguments, so each step is rendered once
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _render_credential_request_blocks(
+        server_name: str,
+        credential: CredentialRequirement,
+        current_index: int,
+        total_count: int,
+    ) -> Tuple[Dict[str, Any], ...]:
         blocks = [
             {
                 "type": "section",
@@ -114,11 +156,10 @@ class SlackAuthService:
                         "text": {"type": "plain_text", "text": "Submit"},
                         "style": "primary",
                         "action_id": "submit_credential",
-                        "value": json.dumps(
-                            {
-                                "flow_id": f"pending_{current_index}",
-                                "credential_index": current_index,
-                            }
+                        # Fixed shape, so format the JSON directly
+                        "value": (
+                            f'{{"flow_id": "pending_{current_index}", '
+                            f'"credential_index": {current_index}}}'
                         ),
                     },
                     {
@@ -145,7 +186,7 @@ class SlackAuthService:
                 },
             )
 
-        return blocks
+        return tuple(blocks)
 
     async def handle_credential_submission(
         self,
@@ -181,7 +222,7 @@ class SlackAuthService:
                     blocks=blocks,
                 )
             except SlackApiError as e:
-                print(f"Error updating credential request: {e}")
+                logger.error("Error updating credential request: %s", e)
                 return False
         else:
             await self._save_collected_credentials(flow_data)
@@ -206,25 +247,23 @@ class SlackAuthService:
                     ],
                 )
             except SlackApiError as e:
-                print(f"Error sending success message: {e}")
+                logger.error("Error sending success message: %s", e)
 
             del self.pending_auth_flows[flow_id]
 
         return True
 
     async def _save_collected_credentials(self, flow_data: Dict[str, Any]):
+        team_id = await self._get_team_id()
+
         db_manager = get_db_manager()
         async with db_manager.session() as session:
             user_repo = UserRepository(session)
             cred_repo = CredentialRepository(session)
             server_repo = ServerRepository(session)
 
-            # Get team info
-            auth_response = await self.slack_client.auth_test()
-            team_id = auth_response["team_id"]
-
             user = await user_repo.get_user_by_slack_id(
-                flow_data["user_slack_id"], team_id or ""
+                flow_data["user_slack_id"], team_id
             )
 
             if not user:
@@ -234,7 +273,7 @@ class SlackAuthService:
                 profile = user_info.get("user", {}).get("profile", {})
                 user = await user_repo.create_user(
                     slack_user_id=flow_data["user_slack_id"],
-                    slack_team_id=team_id or "",
+                    slack_team_id=team_id,
                     email=profile.get("email"),
                     display_name=profile.get("display_name"),
                     real_name=profile.get("real_name"),
@@ -242,13 +281,11 @@ class SlackAuthService:
 
             server = await server_repo.get_server_by_name(flow_data["server_name"])
             if server:
-                for cred_name, cred_value in flow_data["collected"].items():
-                    await cred_repo.store_credential(
-                        user_id=user.id,  # type: ignore[arg-type]
-                        credential_type=flow_data["server_name"],
-                        credential_name=cred_name,
-                        value=cred_value,
-                    )
+                await cred_repo.store_credentials(
+                    user_id=user.id,  # type: ignore[arg-type]
+                    credential_type=flow_data["server_name"],
+                    credentials=flow_data["collected"],
+                )
 
     async def check_missing_credentials(
         self,
@@ -258,8 +295,9 @@ class SlackAuthService:
         server_config: Dict[str, Any],
     ) -> List[CredentialRequirement]:
         required_credentials = MCPMetadataParser.parse_server_metadata(server_config)
+        required_names = {req.name for req in required_credentials if req.required}
 
-        if not required_credentials:
+        if not required_names:
             return []
 
         db_manager = get_db_manager()
@@ -271,12 +309,15 @@ class SlackAuthService:
             if not user:
                 return required_credentials
 
-            user_credentials = await cred_repo.get_user_credentials(user.id)  # type: ignore[arg-type]
-            server_credentials = user_credentials.get(server_name, {})
-
-            missing = []
-            for req in required_credentials:
-                if req.required and req.name not in server_credentials:
-                    missing.append(req)
+            # Only check which names exist; values aren't needed or decrypted
+            present = await cred_repo.get_present_credential_names(
+                user.id,  # type: ignore[arg-type]
+                server_name,
+                required_names,
+            )
 
-            return missing
+        return [
+            req
+            for req in required_credentials
+            if req.required and req.name not in present
+        ]
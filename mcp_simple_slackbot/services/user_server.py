@@ -1,6 +1,7 @@
 import asyncio
+import logging
 from contextlib import AsyncExitStack
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
@@ -8,6 +9,12 @@ from mcp.client.stdio import stdio_client
 from ..database.models import MCPServer, User
 from .mcp_metadata import MCPMetadataParser
 
+logger = logging.getLogger(__name__)
+
+
+def _make_server_id(slack_user_id: str, server_name: str) -> str:
+    return f"{slack_user_id}_{server_name}"
+
 
 class UserMCPServer:
     def __init__(
@@ -19,10 +26,19 @@ class UserMCPServer:
         self.session: Optional[ClientSession] = None
         self.exit_stack: Optional[AsyncExitStack] = None
         self._tools_cache: Optional[List[Dict[str, Any]]] = None
+        self._server_id = _make_server_id(
+            user.slack_user_id,  # type: ignore[arg-type]
+            server_config.name,  # type: ignore[arg-type]
+        )
 
     @property
     def server_id(self) -> str:
-        return f"{self.user.slack_user_id}_{self.server_config.name}"
+        return self._server_id
+
+    @property
+    def tools_listed(self) -> bool:
+        """Whether the last ``list_tools`` call reached the server."""
+        return self._tools_cache is not None
 
     async def initialize(self) -> bool:
         try:
@@ -54,9 +70,11 @@ class UserMCPServer:
 
             return True
         except Exception as e:
-            print(
-                f"Failed to initialize server {self.server_config.name} "
-                f"for user {self.user.slack_user_id}: {e}"
+            logger.error(
+                "Failed to initialize server %s for user %s: %s",
+                self.server_config.name,
+                self.user.slack_user_id,
+                e,
             )
             await self.cleanup()
             return False
@@ -93,7 +111,7 @@ class UserMCPServer:
             ]
             return self._tools_cache
         except Exception as e:
-            print(f"Error listing tools for {self.server_config.name}: {e}")
+            logger.error("Error listing tools for %s: %s", self.server_config.name, e)
             return []
 
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
@@ -106,58 +124,125 @@ class UserMCPServer:
             )
             return response
         except Exception as e:
-            print(f"Error calling tool {tool_name} on {self.server_config.name}: {e}")
+            logger.error(
+                "Error calling tool %s on %s: %s", tool_name, self.server_config.name, e
+            )
             raise
 
 
 class UserServerManager:
-    def __init__(self):
+    def __init__(self, on_change: Optional[Callable[[str], None]] = None):
+        # Called with a slack_user_id whenever that user's servers change
+        self._on_change = on_change
         self.user_servers: Dict[str, UserMCPServer] = {}
+        # slack_user_id -> ids of that user's entries in user_servers
+        self._by_user: Dict[str, Set[str]] = {}
+        # server_id -> lock held while that server initializes
+        self._init_locks: Dict[str, asyncio.Lock] = {}
+        # slack_user_id -> tool name -> server providing it
+        self._tool_index: Dict[str, Dict[str, UserMCPServer]] = {}
 
     async def get_or_create_server(
         self, user: User, server_config: MCPServer, credentials: Dict[str, str]
     ) -> Optional[UserMCPServer]:
-        server_id = f"{user.slack_user_id}_{server_config.name}"
+        server_id = _make_server_id(
+            user.slack_user_id,  # type: ignore[arg-type]
+            server_config.name,  # type: ignore[arg-type]
+        )
 
         if server_id in self.user_servers:
             return self.user_servers[server_id]
 
-        user_server = UserMCPServer(user, server_config, credentials)
-        if await user_server.initialize():
-            self.user_servers[server_id] = user_server
-            return user_server
+        # Concurrent callers wait for one initialization instead of each
+        # spawning their own server process
+        lock = self._init_locks.setdefault(server_id, asyncio.Lock())
+        async with lock:
+            if server_id in self.user_servers:
+                return self.user_servers[server_id]
+
+            initialized = False
+            try:
+                user_server = UserMCPServer(user, server_config, credentials)
+                initialized = await user_server.initialize()
+                if initialized:
+                    self.user_servers[server_id] = user_server
+                    self._by_user.setdefault(user.slack_user_id, set()).add(server_id)  # type: ignore[arg-type]
+                    self._servers_changed(user.slack_user_id)  # type: ignore[arg-type]
+                    return user_server
+            finally:
+                # Failed servers are never registered, so nothing else would
+                # drop their lock; waiters already hold a reference to it
+                if not initialized and self._init_locks.get(server_id) is lock:
+                    del self._init_locks[server_id]
 
         return None
 
     async def get_user_servers(self, user: User) -> List[UserMCPServer]:
         return [
-            server
-            for server_id, server in self.user_servers.items()
-            if server_id.startswith(f"{user.slack_user_id}_")
+            self.user_servers[server_id]
+            for server_id in self._by_user.get(user.slack_user_id, ())  # type: ignore[call-overload]
         ]
 
     async def cleanup_user_servers(self, user: User):
-        user_prefix = f"{user.slack_user_id}_"
-        servers_to_remove = [
-            server_id
-            for server_id in self.user_servers.keys()
-            if server_id.startswith(user_prefix)
-        ]
+        servers_to_remove = self._by_user.pop(user.slack_user_id, set())  # type: ignore[call-overload]
 
+        self._servers_changed(user.slack_user_id)  # type: ignore[arg-type]
         for server_id in servers_to_remove:
-            server = self.user_servers.pop(server_id)
-            await server.cleanup()
+            self._init_locks.pop(server_id, None)
+        servers = [self.user_servers.pop(server_id) for server_id in servers_to_remove]
+        # Tear down concurrently; one failing server shouldn't block the rest
+        await asyncio.gather(
+            *(server.cleanup() for server in servers), return_exceptions=True
+        )
 
     async def cleanup_all(self):
-        for server in self.user_servers.values():
-            await server.cleanup()
+        for slack_user_id in list(self._by_user):
+            self._servers_changed(slack_user_id)
+        servers = list(self.user_servers.values())
         self.user_servers.clear()
+        self._by_user.clear()
+        self._init_locks.clear()
+        self._tool_index.clear()
+        await asyncio.gather(
+            *(server.cleanup() for server in servers), return_exceptions=True
+        )
+
+    def _servers_changed(self, slack_user_id: str) -> None:
+        self._tool_index.pop(slack_user_id, None)
+        if self._on_change is not None:
+            self._on_change(slack_user_id)
+
+    async def get_tool_index(self, user: User) -> Dict[str, UserMCPServer]:
+        index = self._tool_index.get(user.slack_user_id)  # type: ignore[arg-type]
+        if index is None:
+            servers = await self.get_user_servers(user)
+            tool_lists = await asyncio.gather(
+                *(server.list_tools() for server in servers), return_exceptions=True
+            )
+            index = {}
+            complete = True
+            for server, tools in zip(servers, tool_lists):
+                # list_tools returns [] when the server errors or times out
+                if isinstance(tools, BaseException) or not server.tools_listed:
+                    complete = False
+                    continue
+                for tool in tools:
+                    index.setdefault(tool["name"], server)
+            # Keep an incomplete index only for this call so the next one retries
+            if complete:
+                self._tool_index[user.slack_user_id] = index  # type: ignore[index]
+        return index
 
     async def get_user_tools(self, user: User) -> List[Dict[str, Any]]:
         all_tools = []
 
-        for server in await self.get_user_servers(user):
-            tools = await server.list_tools()
+        servers = await self.get_user_servers(user)
+        tool_lists = await asyncio.gather(
+            *(server.list_tools() for server in servers), return_exceptions=True
+        )
+        for server, tools in zip(servers, tool_lists):
+            if isinstance(tools, BaseException):
+                continue
             for tool in tools:
                 tool["server"] = server.server_config.name
                 all_tools.append(tool)
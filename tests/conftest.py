@@ -1,54 +1,103 @@
-import asyncio
-import os
-import tempfile
-from typing import AsyncGenerator, Generator
+from types import MappingProxyType
+from typing import Any, AsyncGenerator, Generator, Mapping
 
 import pytest
 import pytest_asyncio
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from mcp_simple_slackbot.database.encryption import EncryptionService
+from mcp_simple_slackbot.database.models import User
+from mcp_simple_slackbot.database.repositories import clear_server_cache
 from mcp_simple_slackbot.database.session import DatabaseManager
+from mcp_simple_slackbot.database.settings import get_settings
 
 
-@pytest.fixture(scope="session")
-def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.new_event_loop()
-    yield loop
-    loop.close()
+def pytest_collection_modifyitems(items: list[pytest.Item]) -> None:
+    """Run every async test on the session loop the shared engine is bound to."""
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if pytest_asyncio.is_async_test(item):
+            item.add_marker(session_loop, append=False)
 
 
-@pytest.fixture
-def temp_db() -> Generator[str, None, None]:
-    """Create a temporary SQLite database for testing."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-        db_path = f.name
-    
-    db_url = f"sqlite+aiosqlite:///{db_path}"
-    yield db_url
-    
-    # Cleanup
-    try:
-        os.unlink(db_path)
-    except OSError:
-        pass
-
-
-@pytest_asyncio.fixture
-async def db_manager(temp_db: str) -> AsyncGenerator[DatabaseManager, None]:
-    """Create a database manager with a temporary database."""
-    manager = DatabaseManager(temp_db)
+@pytest.fixture(autouse=True)
+def reset_caches() -> Generator[None, None, None]:
+    """Re-read environment settings and drop cached rows for every test."""
+    get_settings.cache_clear()
+    clear_server_cache()
+    yield
+    get_settings.cache_clear()
+    clear_server_cache()
+
+
+# In-memory SQLite gets a StaticPool, so every session shares one connection
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def db_manager() -> AsyncGenerator[DatabaseManager, None]:
+    """Create a database manager with a fresh in-memory database."""
+    manager = DatabaseManager(TEST_DATABASE_URL)
     await manager.create_tables()
     yield manager
     await manager.close()
 
 
-@pytest_asyncio.fixture
-async def db_session(db_manager: DatabaseManager) -> AsyncGenerator[AsyncSession, None]:
-    """Create a database session for testing."""
-    async with db_manager.session() as session:
-        yield session
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def shared_db_manager() -> AsyncGenerator[DatabaseManager, None]:
+    """Create one in-memory database whose schema is shared by the session."""
+    manager = DatabaseManager(TEST_DATABASE_URL)
+    sync_engine = manager.engine.sync_engine
+
+    # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs nest correctly on SQLite
+    @event.listens_for(sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    await manager.create_tables()
+    yield manager
+    await manager.close()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def persistent_user_id(shared_db_manager: DatabaseManager) -> int:
+    """Commit one user to the shared database for tests that only need an id."""
+    async with shared_db_manager.session() as session:
+        user = User(
+            slack_user_id="U000000001",
+            slack_team_id="T000000001",
+            display_name="Persistent User",
+        )
+        session.add(user)
+        await session.flush()
+        return user.id
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def db_session(
+    shared_db_manager: DatabaseManager, persistent_user_id: int
+) -> AsyncGenerator[AsyncSession, None]:
+    """Create a database session whose work is rolled back after the test."""
+    # persistent_user_id is requested here so its commit lands before any
+    # test's outer transaction opens on the shared connection
+    async with shared_db_manager.engine.connect() as conn:
+        transaction = await conn.begin()
+        # Commits inside the test only release a SAVEPOINT
+        session = AsyncSession(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
 
 
 @pytest.fixture
@@ -58,16 +107,22 @@ def encryption_service() -> EncryptionService:
     return EncryptionService(test_key)
 
 
-@pytest.fixture
-def sample_user_data() -> dict:
-    """Sample user data for testing."""
-    return {
+# Read-only view shared by every test; the values are all immutable strings
+_SAMPLE_USER_DATA = MappingProxyType(
+    {
         "slack_user_id": "U123456789",
         "slack_team_id": "T123456789",
         "email": "test@example.com",
         "display_name": "Test User",
         "real_name": "Test User Real",
     }
+)
+
+
+@pytest.fixture(scope="session")
+def sample_user_data() -> Mapping[str, Any]:
+    """Sample user data for testing."""
+    return _SAMPLE_USER_DATA
 
 
 @pytest.fixture
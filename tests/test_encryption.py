@@ -1,4 +1,9 @@
+import base64
+
 import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 from mcp_simple_slackbot.database.encryption import EncryptionService
 
@@ -49,7 +54,7 @@ class TestEncryptionService:
         encrypted1 = encryption_service.encrypt(plaintext)
         encrypted2 = encryption_service.encrypt(plaintext)
         
-        # Fernet includes random IV, so same plaintext should produce different
+        # AES-GCM uses a random nonce, so same plaintext should produce different
         # ciphertext
         assert encrypted1 != encrypted2
         
@@ -57,6 +62,35 @@ class TestEncryptionService:
         assert encryption_service.decrypt(encrypted1) == plaintext
         assert encryption_service.decrypt(encrypted2) == plaintext
 
+    def test_decrypt_legacy_fernet_token(self):
+        """Test that tokens written with Fernet are still readable."""
+        key = EncryptionService.generate_key()
+        service = EncryptionService(key)
+        legacy_token = Fernet(key.encode()).encrypt(b"legacy_secret").decode()
+
+        assert service.decrypt(legacy_token) == "legacy_secret"
+
+    def test_decrypt_baseline_fernet_token(self, monkeypatch):
+        """Test that a token written before the AES-GCM switch still decrypts."""
+        monkeypatch.delenv("ENCRYPTION_KEY", raising=False)
+        monkeypatch.setenv("MASTER_PASSWORD", "test_master_password")
+        monkeypatch.setenv("ENCRYPTION_SALT", "test_salt")
+        baseline_token = (
+            "gAAAAABq0VOydbXZ6ZkcQhWGrPBTt4JMhZkm9tsSFhzUX4tNOjT7bDuBEeVeTGXIR-frBau"
+            "K9dU2dY9XYMGsZFGyjTZPfb48WQ=="
+        )
+
+        assert EncryptionService().decrypt(baseline_token) == "baseline_secret"
+
+    def test_aead_key_differs_from_fernet_key(self):
+        """Test that AES-GCM does not reuse the raw Fernet key bytes."""
+        key = EncryptionService.generate_key()
+        token = base64.urlsafe_b64decode(EncryptionService(key).encrypt("secret"))
+        raw_key_aead = AESGCM(base64.urlsafe_b64decode(key))
+
+        with pytest.raises(InvalidTag):
+            raw_key_aead.decrypt(token[1:13], token[13:], None)
+
     def test_init_with_custom_key(self):
         """Test initialization with custom key."""
         custom_key = EncryptionService.generate_key()
@@ -134,4 +168,28 @@ class TestEncryptionService:
         encrypted = encryption_service.encrypt(long_text)
         decrypted = encryption_service.decrypt(encrypted)
         
-        assert decrypted == long_text
\ No newline at end of file
+        assert decrypted == long_text
+
+    def test_master_password_key_derivation_cached(self, monkeypatch):
+        """Test that repeated construction reuses the derived key."""
+        from mcp_simple_slackbot.database.encryption import _derive_key
+
+        monkeypatch.delenv("ENCRYPTION_KEY", raising=False)
+        monkeypatch.setenv("MASTER_PASSWORD", "cached_password")
+        monkeypatch.setenv("ENCRYPTION_SALT", "cached_salt")
+        _derive_key.cache_clear()
+
+        EncryptionService()
+        EncryptionService()
+
+        info = _derive_key.cache_info()
+        assert info.misses == 1
+        assert info.hits == 1
+
+    def test_master_password_key_derivation_known_answer(self):
+        """Test that the derived key matches previously issued keys."""
+        from mcp_simple_slackbot.database.encryption import _derive_key
+
+        key = _derive_key(b"test_master_password", b"test_salt")
+
+        assert key == b"9GuHny_0gXa9UC_nJjWlUHhQVPew1VLQEFAk6xJ908I="
@@ -1,9 +1,57 @@
+import pytest
 
 from mcp_simple_slackbot.services.mcp_metadata import (
     CredentialRequirement,
     MCPMetadataParser,
 )
 
+CREDENTIAL_TYPE_CASES = [
+    ("JIRA_API_KEY", "api_key"),
+    # ACCESS_TOKEN matches oauth_token now
+    ("GITHUB_ACCESS_TOKEN", "oauth_token"),
+    ("GITHUB_OAUTH_TOKEN", "oauth_token"),  # OAUTH_TOKEN matches oauth_token
+    ("SERVICE_API_KEY", "api_key"),  # API_KEY matches api_key
+    ("DATABASE_USERNAME", "username"),
+    ("DB_PASSWORD", "password"),
+    ("SERVICE_URL", "url"),
+    ("DATABASE_CONNECTION", "database"),
+    ("UNKNOWN_VAR", "generic"),
+]
+
+CREDENTIAL_NAME_CASES = [
+    ("JIRA_API_KEY", "Jira"),
+    # ACCESS is not removed by default
+    ("GITHUB_ACCESS_TOKEN", "Github Access"),
+    ("MCP_SERVER_SLACK_TOKEN", "Slack"),
+    ("API_SOME_SERVICE_KEY", "Some Service"),
+    ("DATABASE_PASSWORD", "Database"),
+    ("SIMPLE_VAR", "Simple Var"),
+]
+
+PLACEHOLDER_VALUES = [
+    "${VAR}",
+    "{{VAR}}",
+    "<VAR>",
+    "[VAR]",
+    "PLACEHOLDER_VALUE",
+    "YOUR_API_KEY",
+    "INSERT_TOKEN_HERE",
+    "CHANGE_ME",
+    "REQUIRED",
+    "NEEDED",
+    "",
+]
+
+FIXED_VALUES = [
+    "fixed_value",
+    "postgresql://localhost/db",
+    "true",
+    "false",
+    "12345",
+    "http://example.com",
+    "/path/to/file",
+]
+
 
 class TestMCPMetadataParser:
     def test_parse_explicit_required_credentials(self):
@@ -66,84 +114,25 @@ class TestMCPMetadataParser:
         assert "DATABASE_URL" not in env_vars  # Fixed value, not placeholder
         assert "NORMAL_VAR" not in env_vars  # Fixed value, not placeholder
 
-    def test_detect_credential_types(self):
+    @pytest.mark.parametrize(("env_var", "expected"), CREDENTIAL_TYPE_CASES)
+    def test_detect_credential_types(self, env_var: str, expected: str):
         """Test automatic credential type detection."""
-        test_cases = [
-            ("JIRA_API_KEY", "api_key"),
-            # ACCESS_TOKEN matches oauth_token now
-            ("GITHUB_ACCESS_TOKEN", "oauth_token"),
-            ("GITHUB_OAUTH_TOKEN", "oauth_token"),  # OAUTH_TOKEN matches oauth_token  
-            ("SERVICE_API_KEY", "api_key"),  # API_KEY matches api_key
-            ("DATABASE_USERNAME", "username"),
-            ("DB_PASSWORD", "password"),
-            ("SERVICE_URL", "url"),
-            ("DATABASE_CONNECTION", "database"),
-            ("UNKNOWN_VAR", "generic"),
-        ]
-        
-        for env_var, expected_type in test_cases:
-            detected_type = MCPMetadataParser._detect_credential_type(env_var)
-            assert detected_type == expected_type, (
-                f"Failed for {env_var}: expected {expected_type}, "
-                f"got {detected_type}"
-            )
+        assert MCPMetadataParser._detect_credential_type(env_var) == expected
 
-    def test_extract_credential_names(self):
+    @pytest.mark.parametrize(("env_var", "expected"), CREDENTIAL_NAME_CASES)
+    def test_extract_credential_names(self, env_var: str, expected: str):
         """Test credential name extraction from environment variables."""
-        test_cases = [
-            ("JIRA_API_KEY", "Jira"),
-            # ACCESS is not removed by default
-            ("GITHUB_ACCESS_TOKEN", "Github Access"),
-            ("MCP_SERVER_SLACK_TOKEN", "Slack"),
-            ("API_SOME_SERVICE_KEY", "Some Service"),
-            ("DATABASE_PASSWORD", "Database"),
-            ("SIMPLE_VAR", "Simple Var"),
-        ]
-        
-        for env_var, expected_name in test_cases:
-            extracted_name = MCPMetadataParser._extract_credential_name(env_var)
-            assert extracted_name == expected_name, (
-                f"Failed for {env_var}: expected {expected_name}, "
-                f"got {extracted_name}"
-            )
+        assert MCPMetadataParser._extract_credential_name(env_var) == expected
 
-    def test_is_credential_placeholder(self):
+    @pytest.mark.parametrize("value", PLACEHOLDER_VALUES)
+    def test_is_credential_placeholder(self, value: str):
         """Test placeholder detection."""
-        # Should be detected as placeholders
-        placeholders = [
-            "${VAR}",
-            "{{VAR}}",
-            "<VAR>",
-            "[VAR]",
-            "PLACEHOLDER_VALUE",
-            "YOUR_API_KEY",
-            "INSERT_TOKEN_HERE",
-            "CHANGE_ME",
-            "REQUIRED",
-            "NEEDED",
-            "",
-        ]
-        
-        for placeholder in placeholders:
-            assert MCPMetadataParser._is_credential_placeholder(
-                placeholder
-            ), f"Failed for: {placeholder}"
-        
-        # Should NOT be detected as placeholders
-        fixed_values = [
-            "fixed_value",
-            "postgresql://localhost/db",
-            "true",
-            "false",
-            "12345",
-            "http://example.com",
-            "/path/to/file",
-        ]
-        
-        for value in fixed_values:
-            assert not MCPMetadataParser._is_credential_placeholder(
-                value
-            ), f"False positive for: {value}"
+        assert MCPMetadataParser._is_credential_placeholder(value)
+
+    @pytest.mark.parametrize("value", FIXED_VALUES)
+    def test_fixed_value_is_not_placeholder(self, value: str):
+        """Test fixed values are not detected as placeholders."""
+        assert not MCPMetadataParser._is_credential_placeholder(value)
 
     def test_build_env_with_credentials(self):
         """Test building environment with credentials."""
@@ -246,4 +235,15 @@ class TestMCPMetadataParser:
         for placeholder in placeholders:
             assert MCPMetadataParser._is_credential_placeholder(
                 placeholder
-            ), f"Failed for: {placeholder}"
\ No newline at end of file
+            ), f"Failed for: {placeholder}"
+
+    def test_parse_server_metadata_is_memoized(self):
+        """Test repeated parses of the same config reuse the cached result."""
+        server_config = {"env": {"SERVICE_API_KEY": "${API_KEY}"}}
+        
+        first = MCPMetadataParser.parse_server_metadata(server_config)
+        second = MCPMetadataParser.parse_server_metadata(dict(server_config))
+        
+        assert first == second
+        assert first is not second
+        assert first[0] is second[0]
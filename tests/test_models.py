@@ -1,7 +1,10 @@
 from datetime import datetime
+from typing import Any
 
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from mcp_simple_slackbot.database.models import (
     Conversation,
@@ -13,6 +16,18 @@ from mcp_simple_slackbot.database.models import (
 )
 
 
+async def load_with(
+    session: AsyncSession, model: Any, pk: int, *relationships: Any
+) -> Any:
+    """Load a row by primary key with the given relationships eager-loaded."""
+    result = await session.execute(
+        select(model)
+        .where(model.id == pk)
+        .options(*(selectinload(rel) for rel in relationships))
+    )
+    return result.scalar_one()
+
+
 class TestUserModel:
     @pytest.mark.asyncio
     async def test_create_user(self, db_session: AsyncSession, sample_user_data: dict):
@@ -38,6 +53,14 @@ class TestUserModel:
         await db_session.flush()
         
         # Test that relationships are properly initialized
+        user = await load_with(
+            db_session,
+            User,
+            user.id,
+            User.credentials,
+            User.server_configs,
+            User.conversations,
+        )
         assert user.credentials == []
         assert user.server_configs == []
         assert user.conversations == []
@@ -69,6 +92,9 @@ class TestMCPServerModel:
         db_session.add(server)
         await db_session.flush()
         
+        server = await load_with(
+            db_session, MCPServer, server.id, MCPServer.user_configs
+        )
         assert server.user_configs == []
 
 
@@ -78,19 +104,14 @@ class TestUserCredentialModel:
         self, db_session: AsyncSession, sample_user_data: dict
     ):
         """Test creating a user credential."""
-        # First create a user
         user = User(**sample_user_data)
-        db_session.add(user)
-        await db_session.flush()
-        
-        # Create credential
         credential = UserCredential(
-            user_id=user.id,
+            user=user,
             credential_type="api_key",
             credential_name="test_api_key",
             encrypted_value="encrypted_test_value",
         )
-        db_session.add(credential)
+        db_session.add_all([user, credential])
         await db_session.flush()
         
         assert credential.id is not None
@@ -105,21 +126,16 @@ class TestUserCredentialModel:
     ):
         """Test credential-user relationship."""
         user = User(**sample_user_data)
-        db_session.add(user)
-        await db_session.flush()
-        
         credential = UserCredential(
-            user_id=user.id,
+            user=user,
             credential_type="api_key",
             credential_name="test_key",
             encrypted_value="encrypted_value",
         )
-        db_session.add(credential)
+        db_session.add_all([user, credential])
         await db_session.flush()
         
-        # Refresh to load relationships
-        await db_session.refresh(user)
-        await db_session.refresh(credential)
+        user = await load_with(db_session, User, user.id, User.credentials)
         
         assert credential.user == user
         assert credential in user.credentials
@@ -134,21 +150,15 @@ class TestUserServerConfigModel:
         sample_server_config: dict,
     ):
         """Test creating a user server configuration."""
-        # Create user and server
         user = User(**sample_user_data)
         server = MCPServer(**sample_server_config)
-        db_session.add(user)
-        db_session.add(server)
-        await db_session.flush()
-        
-        # Create config
         config = UserServerConfig(
-            user_id=user.id,
-            server_id=server.id,
+            user=user,
+            server=server,
             is_enabled=True,
             custom_env={"CUSTOM_VAR": "value"},
         )
-        db_session.add(config)
+        db_session.add_all([user, server, config])
         await db_session.flush()
         
         assert config.id is not None
@@ -167,22 +177,14 @@ class TestUserServerConfigModel:
         """Test user-server configuration relationships."""
         user = User(**sample_user_data)
         server = MCPServer(**sample_server_config)
-        db_session.add(user)
-        db_session.add(server)
+        config = UserServerConfig(user=user, server=server, is_enabled=True)
+        db_session.add_all([user, server, config])
         await db_session.flush()
         
-        config = UserServerConfig(
-            user_id=user.id,
-            server_id=server.id,
-            is_enabled=True,
+        user = await load_with(db_session, User, user.id, User.server_configs)
+        server = await load_with(
+            db_session, MCPServer, server.id, MCPServer.user_configs
         )
-        db_session.add(config)
-        await db_session.flush()
-        
-        # Refresh to load relationships
-        await db_session.refresh(user)
-        await db_session.refresh(server)
-        await db_session.refresh(config)
         
         assert config.user == user
         assert config.server == server
@@ -197,15 +199,12 @@ class TestConversationModel:
     ):
         """Test creating a conversation."""
         user = User(**sample_user_data)
-        db_session.add(user)
-        await db_session.flush()
-        
         conversation = Conversation(
-            user_id=user.id,
+            user=user,
             slack_channel_id="C123456789",
             slack_thread_ts="1234567890.123456",
         )
-        db_session.add(conversation)
+        db_session.add_all([user, conversation])
         await db_session.flush()
         
         assert conversation.id is not None
@@ -219,19 +218,11 @@ class TestConversationModel:
     ):
         """Test conversation-user relationship."""
         user = User(**sample_user_data)
-        db_session.add(user)
+        conversation = Conversation(user=user, slack_channel_id="C123456789")
+        db_session.add_all([user, conversation])
         await db_session.flush()
         
-        conversation = Conversation(
-            user_id=user.id,
-            slack_channel_id="C123456789",
-        )
-        db_session.add(conversation)
-        await db_session.flush()
-        
-        # Refresh to load relationships
-        await db_session.refresh(user)
-        await db_session.refresh(conversation)
+        user = await load_with(db_session, User, user.id, User.conversations)
         
         assert conversation.user == user
         assert conversation in user.conversations
@@ -244,23 +235,14 @@ class TestMessageModel:
     ):
         """Test creating a message."""
         user = User(**sample_user_data)
-        db_session.add(user)
-        await db_session.flush()
-        
-        conversation = Conversation(
-            user_id=user.id,
-            slack_channel_id="C123456789",
-        )
-        db_session.add(conversation)
-        await db_session.flush()
-        
+        conversation = Conversation(user=user, slack_channel_id="C123456789")
         message = Message(
-            conversation_id=conversation.id,
+            conversation=conversation,
             role="user",
             content="Hello, world!",
             slack_ts="1234567890.123456",
         )
-        db_session.add(message)
+        db_session.add_all([user, conversation, message])
         await db_session.flush()
         
         assert message.id is not None
@@ -275,25 +257,18 @@ class TestMessageModel:
     ):
         """Test message-conversation relationship."""
         user = User(**sample_user_data)
-        conversation = Conversation(
-            user_id=user.id,
-            slack_channel_id="C123456789",
-        )
-        db_session.add(user)
-        db_session.add(conversation)
-        await db_session.flush()
-        
+        conversation = Conversation(user=user, slack_channel_id="C123456789")
         message = Message(
-            conversation_id=conversation.id,
+            conversation=conversation,
             role="user",
             content="Test message",
         )
-        db_session.add(message)
+        db_session.add_all([user, conversation, message])
         await db_session.flush()
         
-        # Refresh to load relationships
-        await db_session.refresh(conversation)
-        await db_session.refresh(message)
+        conversation = await load_with(
+            db_session, Conversation, conversation.id, Conversation.messages
+        )
         
         assert message.conversation == conversation
         assert message in conversation.messages
\ No newline at end of file
@@ -0,0 +1,41 @@
+import json
+
+from mcp_simple_slackbot.services.mcp_metadata import CredentialRequirement
+from mcp_simple_slackbot.services.slack_auth import SlackAuthService
+
+
+class TestCredentialRequestBlocks:
+    def test_submit_button_value_is_json(self):
+        """Test the hand-formatted Submit button value stays valid JSON."""
+        credential = CredentialRequirement(
+            type="api_key", name="API Key", description="Key"
+        )
+        
+        blocks = SlackAuthService._build_credential_request_blocks(
+            "jira", credential, 2, 3
+        )
+        
+        submit = blocks[-1]["elements"][0]
+        assert submit["action_id"] == "submit_credential"
+        assert json.loads(submit["value"]) == {
+            "flow_id": "pending_2",
+            "credential_index": 2,
+        }
+
+    def test_blocks_are_not_shared_between_callers(self):
+        """Test that mutating returned blocks leaves later renders intact."""
+        credential = CredentialRequirement(
+            type="api_key", name="API Key", description="Key"
+        )
+        
+        first = SlackAuthService._build_credential_request_blocks(
+            "jira", credential, 0, 1
+        )
+        first[0]["text"]["text"] = "changed"
+        first.pop()
+        second = SlackAuthService._build_credential_request_blocks(
+            "jira", credential, 0, 1
+        )
+        
+        assert second[0]["text"]["text"] != "changed"
+        assert len(second) == len(first) + 1